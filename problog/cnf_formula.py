@@ -24,7 +24,7 @@ Provides access to CNF and weighted CNF.
 """
 from __future__ import print_function
 
-from .formula import BaseFormula, LogicDAG
+from .formula import BaseFormula, LogicDAG, ATOM, CONJ, DISJ
 
 from .core import transform
 from .util import Timer
@@ -119,13 +119,28 @@ class CNF(BaseFormula):
             invert_weights=invert_weights,
         )
 
-        result = "p %s %s\n" % (t, " ".join(map(str, header)))
+        lines = ["p %s %s" % (t, " ".join(map(str, header)))]
         if names:
-            tpl = "c {{:<{}}} {{}}\n".format(len(str(self._atomcount)) + 1)
-            for n, i, l in self.get_names_with_label():
-                result += tpl.format(i, n)
-        result += "\n".join(map(lambda cl: " ".join(map(str, cl)) + " 0", content))
-        return result
+            tpl = "c {{:<{}}} {{}}".format(len(str(self._atomcount)) + 1)
+            lines.extend(tpl.format(i, n) for n, i, l in self.get_names_with_label())
+        if weighted:
+            # Clauses start with a weight, which is not a literal.
+            lit2str = str
+        else:
+            lit2str = _literal_strings(header[0]).__getitem__
+        # Every clause is terminated by ' 0', so it can be used as part of the separator.
+        # The head of a clause can be a bool (forced constraint), which is not a literal and would
+        # otherwise be looked up in the table as 0 or 1.
+        clauses = " 0\n".join(
+            [
+                " ".join(map(str if cl and type(cl[0]) is bool else lit2str, cl))
+                for cl in content
+            ]
+        )
+        if content:
+            clauses += " 0"
+        lines.append(clauses)
+        return "\n".join(lines)
 
     def to_lp(self, partial=False, semiring=None, smart_constraints=False):
         """Transfrom to CPLEX lp format (MIP program).
@@ -347,6 +362,15 @@ class CNF(BaseFormula):
         return self._clausecount
 
 
+def _literal_strings(atomcount):
+    """Create a table of the string representations of all literals.
+
+    :param atomcount: number of atoms
+    :return: list in which the item at (negative) index i is str(i), for -atomcount <= i <= atomcount
+    """
+    return [str(i) for i in range(atomcount + 1)] + [str(i) for i in range(-atomcount, 0)]
+
+
 # noinspection PyUnusedLocal
 @transform(LogicDAG, CNF)
 def clarks_completion(source, destination, force_atoms=False, **kwdargs):
@@ -370,16 +394,17 @@ def clarks_completion(source, destination, force_atoms=False, **kwdargs):
 
         # Complete other nodes
         # Note: assumes negation is encoded as negative number.
-        for index, node, nodetype in source:
-            if nodetype == "conj":
-                destination.add_clause(index, list(map(lambda x: -x, node.children)))
+        for index, node, _ in source:
+            nodetype = node._nodetype
+            if nodetype == CONJ:
+                destination.add_clause(index, [-x for x in node.children])
                 for c in node.children:
                     destination.add_clause(-index, [c])
-            elif nodetype == "disj":
+            elif nodetype == DISJ:
                 destination.add_clause(-index, node.children)
                 for c in node.children:
                     destination.add_clause(index, [-c])
-            elif nodetype == "atom":
+            elif nodetype == ATOM:
                 pass
             else:
                 raise ValueError("Unexpected node type: '%s'" % nodetype)
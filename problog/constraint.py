@@ -305,7 +305,7 @@ class ClauseConstraint(Constraint):
     def copy(self, rename=None):
         if rename is None:
             rename = {}
-        return ClauseConstraint(map(lambda x: rename.get(x, x), self.nodes))
+        return ClauseConstraint([rename.get(x, x) for x in self.nodes])
 
     def __str__(self):
         return "%s is true" % self.nodes
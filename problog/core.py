@@ -37,6 +37,8 @@ class ProbLog(object):
     transformations = defaultdict(list)
     create_as = defaultdict(list)
     allow_subclass = set()
+    # Transformation paths per (source class, target class), cleared when a registry changes.
+    _path_cache = {}
 
     @classmethod
     def register_transformation(cls, src, target, action=None):
@@ -47,6 +49,7 @@ class ProbLog(object):
         :param action: transformation function
         """
         cls.transformations[target].append((src, action))
+        cls._path_cache.clear()
 
     @classmethod
     def register_create_as(cls, repl, orig):
@@ -57,6 +60,7 @@ class ProbLog(object):
         :param orig: object construction we can use instead
         """
         cls.create_as[repl].append(orig)
+        cls._path_cache.clear()
 
     @classmethod
     def register_allow_subclass(cls, orig):
@@ -65,6 +69,7 @@ class ProbLog(object):
         :param orig:
         """
         cls.allow_subclass.add(orig)
+        cls._path_cache.clear()
 
     @classmethod
     def find_paths(cls, src, target, stack=()):
@@ -98,6 +103,24 @@ class ProbLog(object):
                         for path in cls.find_paths(src, s, stack + (s,)):
                             yield path + (action, tar)
 
+    @classmethod
+    def get_paths(cls, src, target):
+        """Get all possible paths to transform the src object into the target class.
+
+        The paths only depend on the class of the source object, so they are computed once \
+        with :meth:`find_paths` and cached.
+
+        :param src: object to transform
+        :param target: class to tranform the object to
+        :return: tuple of paths (as in :meth:`find_paths`)
+        """
+        key = (type(src), target)
+        paths = cls._path_cache.get(key)
+        if paths is None:
+            paths = tuple(cls.find_paths(src, target))
+            cls._path_cache[key] = paths
+        return paths
+
     @classmethod
     def convert(cls, src, target, **kwdargs):
         """Convert the source object into an object of the target class.
@@ -112,7 +135,7 @@ class ProbLog(object):
                 return src.clone(target(**kwdargs))
 
         # Find transformation paths from source to target.
-        for path in cls.find_paths(src, target):
+        for path in cls.get_paths(src, target):
             try:
                 # A path is a sequence of obj, function, obj/class, ..., obj/class
                 current_obj = src
@@ -23,19 +23,32 @@ Provides access to d-DNNF formulae.
 """
 from __future__ import print_function
 
+import functools
+import math
 import tempfile
 import os
 import subprocess
+from array import array
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from . import system_info
-from .evaluator import Evaluator, EvaluatableDSP
+from .evaluator import (
+    Evaluator,
+    EvaluatableDSP,
+    SemiringProbability,
+    SemiringLogProbability,
+)
 from .errors import InconsistentEvidenceError
-from .formula import LogicDAG
+from .formula import LogicDAG, ATOM, CONJ, DISJ
 from .cnf_formula import CNF
 from .core import transform
 from .errors import CompilationError
-from .util import Timer, subprocess_check_call
+from .util import Timer, subprocess_check_call, kill_running_processes
+
+
+# Path through which a compiler can read its standard input as a file (not available on Windows).
+_STDIN = "/dev/stdin"
 
 
 class DSharpError(CompilationError):
@@ -56,6 +69,62 @@ class DDNNF(LogicDAG, EvaluatableDSP):
     # noinspection PyUnusedLocal,PyUnusedLocal,PyUnusedLocal
     def __init__(self, **kwdargs):
         LogicDAG.__init__(self, auto_compact=False)
+        self._init_node_arrays()
+
+    def _init_node_arrays(self):
+        # Structure-of-arrays copy of the nodes, indexed by node key (entry 0 is a placeholder).
+        # The children of node i are _node_children[_node_offsets[i]:_node_offsets[i + 1]].
+        self._node_types = bytearray(1)
+        self._node_children = array("i")
+        self._node_offsets = array("i", [0, 0])
+        # True as long as all children of a node precede it.
+        self._node_sorted = True
+
+    def _append_node_arrays(self, node):
+        ntype = node._nodetype
+        self._node_types.append(ntype)
+        if ntype != ATOM:
+            self._node_children.extend(node.children)
+        self._node_offsets.append(len(self._node_children))
+
+    def _add(self, node, key=None, reuse=True):
+        index = LogicDAG._add(self, node, key=key, reuse=reuse)
+        if index == len(self._node_types):
+            self._append_node_arrays(node)
+        return index
+
+    def _update(self, key, value):
+        LogicDAG._update(self, key, value)
+        # Most updates only rename a node (see add_name), which leaves the arrays unchanged.
+        ntype = value._nodetype
+        new_children = () if ntype == ATOM else value.children
+        offsets = self._node_offsets
+        start, end = offsets[key], offsets[key + 1]
+        if ntype == self._node_types[key] and tuple(
+            self._node_children[start:end]
+        ) == tuple(new_children):
+            return
+        self._node_types[key] = ntype
+        self._node_children[start:end] = array("i", new_children)
+        shift = len(new_children) - (end - start)
+        if shift:
+            for i in range(key + 1, len(offsets)):
+                offsets[i] += shift
+        if any(abs(c) >= key for c in new_children):
+            # The updated node refers to a node that was added after it.
+            self._node_sorted = False
+
+    def get_node_arrays(self):
+        """Get the structure of the formula as flat arrays.
+
+        :return: tuple (types, children, offsets) where types[i] is the type tag (ATOM, CONJ or \
+        DISJ) of node i, and the children of node i are children[offsets[i]:offsets[i + 1]]
+        """
+        return self._node_types, self._node_children, self._node_offsets
+
+    def is_sorted(self):
+        """Check whether the children of each node precede the node itself."""
+        return self._node_sorted
 
     def _create_evaluator(self, semiring, weights, **kwargs):
         return SimpleDDNNFEvaluator(self, semiring, weights)
@@ -66,10 +135,17 @@ class SimpleDDNNFEvaluator(Evaluator):
 
     def __init__(self, formula, semiring, weights=None, **kwargs):
         Evaluator.__init__(self, formula, semiring, weights, **kwargs)
+        self._root = len(formula)  # the root is the last node of the d-DNNF
         self.cache_intermediate = {}  # weights of intermediate nodes
+        self.parents = defaultdict(list)  # intermediate nodes that use a node as child
+        types, children, offsets = formula.get_node_arrays()
+        for index in range(1, len(types)):
+            for c in children[offsets[index] : offsets[index + 1]]:
+                self.parents[abs(c)].append(index)
 
     def _initialize(self, with_evidence=True):
         self.weights.clear()
+        self.cache_intermediate.clear()
 
         model_weights = self.formula.extract_weights(self.semiring, self.given_weights)
         self.weights = model_weights.copy()
@@ -117,15 +193,21 @@ class SimpleDDNNFEvaluator(Evaluator):
         else:
             p = self._get_weight(abs(node))
             n = self._get_weight(-abs(node))
+            cached = self._invalidate(abs(node))
             self._set_value(abs(node), (node > 0))
+            if cached and self.formula.is_sorted():
+                # Only the ancestors of the node changed, recompute them in topological order.
+                self._calculate_weights(sorted(cached))
             result = self.get_root_weight()
-            self._reset_value(abs(node), p, n)
+            self._reset_value(abs(node), p, n, cached)
             if self.has_evidence() or self.semiring.is_nsp():
                 result = self.semiring.normalize(result, self._get_z())
         return self.semiring.result(result, self.formula)
 
-    def _reset_value(self, index, pos, neg):
+    def _reset_value(self, index, pos, neg, cached=None):
         self.set_weight(index, pos, neg)
+        if cached:
+            self.cache_intermediate.update(cached)
 
     def get_root_weight(self):
         """
@@ -133,10 +215,13 @@ class SimpleDDNNFEvaluator(Evaluator):
         :return: The WMC of the root of this formula (WMC of node len(self.formula)), multiplied with weight of True
         (self.weights.get(0)).
         """
-        result = self._get_weight(len(self.formula))
+        if not self.cache_intermediate:
+            self._calculate_all_weights()
+        result = self._get_weight(self._root)
+        true_weight = self.weights.get(0)
         return (
-            self.semiring.times(result, self.weights.get(0)[0])
-            if self.weights.get(0) is not None
+            self.semiring.times(result, true_weight[0])
+            if true_weight is not None
             else result
         )
 
@@ -152,14 +237,90 @@ class SimpleDDNNFEvaluator(Evaluator):
                 return w[index < 0]
             w = self.cache_intermediate.get(abs_index)  # Intermediate nodes
             if w is None:
-                w = self._calculate_weight(index)
-                self.cache_intermediate[abs_index] = w
+                w = self._calculate_weight(abs_index)
             return w
 
+    def _calculate_all_weights(self):
+        """Compute the weights of all intermediate nodes in a single bottom-up sweep.
+
+        The children of a node in a d-DNNF are added before the node itself, so visiting the
+        nodes in index order guarantees that all child weights are available when a node is
+        combined. This avoids the deep recursion of :meth:`_get_weight` on large formulas.
+        """
+        semiring = self.semiring
+        cache = self.cache_intermediate
+        types, children, offsets = self.formula.get_node_arrays()
+
+        sweep = _SWEEP_KERNELS.get(type(semiring))
+        if (
+            sweep is not None
+            and self.formula.is_sorted()
+            and all(types[k] == ATOM for k in self.weights if k)
+        ):
+            # Fast path: evaluate the circuit on plain lists of floats.
+            one = semiring.one()
+            pos = [one] * len(types)
+            neg = [one] * len(types)
+            for k, w in self.weights.items():
+                if k:
+                    pos[k], neg[k] = w
+            sweep(types, children, offsets, pos, neg)
+            for index in range(1, len(types)):
+                if types[index] != ATOM:
+                    cache[index] = pos[index]
+            return
+
+        self._calculate_weights(range(1, len(types)))
+
+    def _calculate_weights(self, indices):
+        """Compute and cache the weights of the given nodes, in the given order.
+
+        :param indices: indices of the nodes; the children of each intermediate node must be \
+        atoms, cached or occur earlier in indices
+        """
+        semiring = self.semiring
+        cache = self.cache_intermediate
+        zero = semiring.zero()
+        types, children, offsets = self.formula.get_node_arrays()
+        for index in indices:
+            ntype = types[index]
+            if ntype == CONJ:
+                p = semiring.one()
+                for c in children[offsets[index] : offsets[index + 1]]:
+                    p = semiring.times(p, self._get_weight(c))
+                    if p == zero:
+                        # The remaining children cannot change the result.
+                        break
+                cache[index] = p
+            elif ntype == DISJ:
+                p = semiring.zero()
+                for c in children[offsets[index] : offsets[index + 1]]:
+                    p = semiring.plus(p, self._get_weight(c))
+                cache[index] = p
+
     def set_weight(self, index, pos, neg):
         # index = index of atom in weights, so atom2var[key] = index
         self.weights[index] = (pos, neg)
-        self.cache_intermediate.clear()
+        self._invalidate(index)
+
+    def _invalidate(self, index):
+        """Remove the cached weights of all ancestors of the given node.
+
+        A node is only cached after the children it depends on, so the search can stop at \
+        nodes that are not cached.
+
+        :param index: index of the node whose weight changed
+        :return: dictionary of the removed cache entries
+        """
+        cache = self.cache_intermediate
+        removed = {}
+        queue = [abs(index)]
+        while queue:
+            for parent in self.parents.get(queue.pop(), ()):
+                if parent in cache:
+                    removed[parent] = cache.pop(parent)
+                    queue.append(parent)
+        return removed
 
     def set_evidence(self, index, value):
         curr_pos_weight, curr_neg_weight = self.weights.get(index)
@@ -191,30 +352,106 @@ class SimpleDDNNFEvaluator(Evaluator):
             self.set_weight(index, self.semiring.zero(), neg)
 
     def _calculate_weight(self, key):
+        """Compute and cache the weight of the given node.
+
+        The uncached descendants of the node are visited in post-order using an explicit stack,
+        such that deep formulas do not run into the recursion limit.
+
+        :param key: index of the node (> 0)
+        :return: weight of the node
+        """
         assert key != 0
         assert key is not None
-        # assert(key > 0)
+        assert key > 0
+
+        semiring = self.semiring
+        weights = self.weights
+        cache = self.cache_intermediate
+        types, children, offsets = self.formula.get_node_arrays()
+        stack = [(key, False)]
+        while stack:
+            index, expanded = stack.pop()
+            if index in cache:
+                # Shared child that was already computed through another parent.
+                continue
+            ntype = types[index]
+
+            if ntype == ATOM:
+                cache[index] = semiring.one()
+            elif ntype != CONJ and ntype != DISJ:
+                raise TypeError("Unexpected node type: '%s'." % ntype)
+            elif not expanded:
+                stack.append((index, True))
+                for c in children[offsets[index] : offsets[index + 1]]:
+                    c = abs(c)
+                    if c and c not in weights and c not in cache:
+                        stack.append((c, False))
+            else:
+                self._calculate_weights((index,))
+        return cache[key]
+
+
+def _sweep_probability(types, children, offsets, pos, neg):
+    """Compute the probabilities of all intermediate nodes of a sorted d-DNNF in place.
+
+    :param types: node type codes
+    :param children: concatenated children of all nodes
+    :param offsets: offsets of the children of each node
+    :param pos: positive weight of each node (atom weights are given)
+    :param neg: negative weight of each node (atom weights are given)
+    """
+    for i in range(1, len(types)):
+        t = types[i]
+        if t == CONJ:
+            p = 1.0
+            for c in children[offsets[i] : offsets[i + 1]]:
+                p *= pos[c] if c > 0 else neg[-c]
+            pos[i] = neg[i] = p
+        elif t == DISJ:
+            p = 0.0
+            for c in children[offsets[i] : offsets[i + 1]]:
+                p += pos[c] if c > 0 else neg[-c]
+            pos[i] = neg[i] = p
+
+
+def _sweep_log_probability(types, children, offsets, pos, neg):
+    """Compute the log-probabilities of all intermediate nodes of a sorted d-DNNF in place.
+
+    Conjunctions add the log-weights of their children. Disjunctions use a log-sum-exp that is \
+    shifted by the largest child, such that deep circuits do not underflow.
+
+    :param types: node type codes
+    :param children: concatenated children of all nodes
+    :param offsets: offsets of the children of each node
+    :param pos: positive log-weight of each node (atom weights are given)
+    :param neg: negative log-weight of each node (atom weights are given)
+    """
+    ninf = float("-inf")
+    for i in range(1, len(types)):
+        t = types[i]
+        if t == CONJ:
+            p = 0.0
+            for c in children[offsets[i] : offsets[i + 1]]:
+                p += pos[c] if c > 0 else neg[-c]
+            pos[i] = neg[i] = p
+        elif t == DISJ:
+            ws = [
+                pos[c] if c > 0 else neg[-c]
+                for c in children[offsets[i] : offsets[i + 1]]
+            ]
+            m = max(ws) if ws else ninf
+            if m == ninf:
+                p = ninf
+            else:
+                p = m + math.log(sum(math.exp(w - m) for w in ws))
+            pos[i] = neg[i] = p
 
-        node = self.formula.get_node(abs(key))
-        ntype = type(node).__name__
 
-        if ntype == "atom":
-            return self.semiring.one()
-        else:
-            assert key > 0
-            childprobs = [self._get_weight(c) for c in node.children]
-            if ntype == "conj":
-                p = self.semiring.one()
-                for c in childprobs:
-                    p = self.semiring.times(p, c)
-                return p
-            elif ntype == "disj":
-                p = self.semiring.zero()
-                for c in childprobs:
-                    p = self.semiring.plus(p, c)
-                return p
-            else:
-                raise TypeError("Unexpected node type: '%s'." % ntype)
+# Specialized implementations of SimpleDDNNFEvaluator._calculate_all_weights per semiring.
+_SWEEP_KERNELS = {
+    SemiringProbability: _sweep_probability,
+    SemiringLogProbability: _sweep_log_probability,
+}
 
 
 class Compiler(object):
@@ -251,6 +488,36 @@ class Compiler(object):
         """
         cls.__compilers[name] = func
 
+    @classmethod
+    def compile_many(cls, cnfs, name=None, max_workers=None, **kwdargs):
+        """Compile several CNFs concurrently.
+
+        The compiler tools do not support compiling several formulas in one process, so each CNF \
+        is compiled by its own process. These processes run in parallel.
+
+        When the compilation is interrupted (KeyboardInterrupt or SystemExit), all subprocesses \
+        that ProbLog is running at that moment are killed (see \
+        :func:`problog.util.kill_running_processes`), not only the compilers started here.
+
+        :param cnfs: CNFs to compile
+        :param name: name of the compiler (or default if None)
+        :param max_workers: maximal number of simultaneous compilations (default: number of CPUs)
+        :param kwdargs: additional arguments passed to the compiler
+        :return: list of compiled DDNNFs, in the order of the given CNFs
+        """
+        func = cls.get(name)
+        executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        results = executor.map(functools.partial(func, **kwdargs), cnfs)
+        try:
+            return list(results)
+        except (KeyboardInterrupt, SystemExit):
+            # The worker threads are not interrupted, so stop their compilers explicitly.
+            results.close()  # cancels the compilations that have not started yet
+            kill_running_processes()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
 
 if system_info.get("c2d", False):
     # noinspection PyUnusedLocal
@@ -285,25 +552,31 @@ if system_info.get("c2d", False):
 def _compile_with_dsharp(cnf, nnf=None, smooth=True, **kwdargs):
     result = None
     with Timer("DSharp compilation"):
-        fd1, cnf_file = tempfile.mkstemp(".cnf")
+        if os.path.exists(_STDIN):
+            # Pass the CNF to dsharp through a pipe.
+            cnf_file = None
+        else:
+            fd1, cnf_file = tempfile.mkstemp(".cnf")
+            os.close(fd1)
         fd2, nnf_file = tempfile.mkstemp(".nnf")
-        os.close(fd1)
         os.close(fd2)
         if smooth:
             smoothl = ["-smoothNNF"]
         else:
             smoothl = []
-        cmd = ["dsharp", "-Fnnf", nnf_file] + smoothl + ["-disableAllLits", cnf_file]  #
+        cmd = ["dsharp", "-Fnnf", nnf_file] + smoothl + ["-disableAllLits"]
+        cmd.append(_STDIN if cnf_file is None else cnf_file)
 
         try:
             result = _compile(cnf, cmd, cnf_file, nnf_file)
         except subprocess.CalledProcessError:
             raise DSharpError()
 
-        try:
-            os.remove(cnf_file)
-        except OSError:
-            pass
+        if cnf_file is not None:
+            try:
+                os.remove(cnf_file)
+            except OSError:
+                pass
         try:
             os.remove(nnf_file)
         except OSError:
@@ -316,6 +589,14 @@ Compiler.add("dsharp", _compile_with_dsharp)
 
 
 def _compile(cnf, cmd, cnf_file, nnf_file):
+    """Compile the CNF with the given command and load the resulting d-DNNF.
+
+    :param cnf: CNF to compile
+    :param cmd: command that runs the compiler
+    :param cnf_file: file the command reads the CNF from, or None if it reads from stdin
+    :param nnf_file: file the command writes the d-DNNF to
+    :return: compiled DDNNF
+    """
     names = cnf.get_names_with_label()
 
     if cnf.is_trivial():
@@ -336,15 +617,19 @@ def _compile(cnf, cmd, cnf_file, nnf_file):
 
         return nnf
     else:
-        with open(cnf_file, "w") as f:
-            f.write(cnf.to_dimacs())
+        if cnf_file is None:
+            data = cnf.to_dimacs().encode()
+        else:
+            data = None
+            with open(cnf_file, "w") as f:
+                f.write(cnf.to_dimacs())
 
         attempts_left = 1
         success = False
         while attempts_left and not success:
             try:
                 with open(os.devnull, "w") as OUT_NULL:
-                    subprocess_check_call(cmd, stdout=OUT_NULL)
+                    subprocess_check_call(cmd, stdout=OUT_NULL, input=data)
                 success = True
             except subprocess.CalledProcessError as err:
                 attempts_left -= 1
@@ -362,43 +647,42 @@ def _load_nnf(filename, cnf):
     for name, node, label in cnf.get_names_with_label():
         names_inv[node].append((name, label))
 
-    with open(filename) as f:
-        line2node = {}
-        rename = {}
-        lnum = 0
-        for line in f:
-            line = line.strip().split()
-            if line[0] == "nnf":
-                pass
-            elif line[0] == "L":
-                name = int(line[1])
-                prob = weights.get(abs(name), True)
-                node = nnf.add_atom(abs(name), prob)
-                rename[abs(name)] = node
-                if name < 0:
-                    node = -node
-                line2node[lnum] = node
-                if name in names_inv:
-                    for actual_name, label in names_inv[name]:
-                        nnf.add_name(actual_name, node, label)
-                    del names_inv[name]
-                lnum += 1
-            elif line[0] == "A":
-                children = map(lambda x: line2node[int(x)], line[2:])
-                line2node[lnum] = nnf.add_and(children)
-                lnum += 1
-            elif line[0] == "O":
-                children = map(lambda x: line2node[int(x)], line[3:])
-                line2node[lnum] = nnf.add_or(children)
-                lnum += 1
+    with open(filename, "rb") as f:
+        rows = f.read().splitlines()
+
+    line2node = array("i")  # node of each node line in the file, in order
+    rename = {}
+    for line in rows:
+        line = line.split()
+        if not line:
+            continue
+        ltype = line[0]
+        if ltype == b"nnf":
+            pass
+        elif ltype == b"L":
+            name = int(line[1])
+            prob = weights.get(abs(name), True)
+            node = nnf.add_atom(abs(name), prob)
+            rename[abs(name)] = node
+            if name < 0:
+                node = -node
+            line2node.append(node)
+            entries = names_inv.pop(name, None)
+            if entries:
+                for actual_name, label in entries:
+                    nnf.add_name(actual_name, node, label)
+        elif ltype == b"A":
+            line2node.append(nnf.add_and([line2node[int(x)] for x in line[2:]]))
+        elif ltype == b"O":
+            line2node.append(nnf.add_or([line2node[int(x)] for x in line[3:]]))
+        else:
+            print("Unknown line type")
+    for name, entries in names_inv.items():
+        for actual_name, label in entries:
+            if name == 0:
+                nnf.add_name(actual_name, 0, label)
             else:
-                print("Unknown line type")
-        for name in names_inv:
-            for actual_name, label in names_inv[name]:
-                if name == 0:
-                    nnf.add_name(actual_name, 0, label)
-                else:
-                    nnf.add_name(actual_name, None, label)
+                nnf.add_name(actual_name, None, label)
     for c in cnf.constraints():
         nnf.add_constraint(c.copy(rename))
 
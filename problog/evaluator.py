@@ -26,6 +26,7 @@ from __future__ import print_function
 import math
 
 from .core import ProbLogObject, transform_allow_subclass
+from .logic import Constant
 from .errors import InconsistentEvidenceError, InvalidValue, ProbLogError, InstallError
 
 try:
@@ -183,6 +184,10 @@ class Semiring(object):
 class SemiringProbability(Semiring):
     """Implementation of the semiring interface for probabilities."""
 
+    # Conversion to float of external values by exact type, bypassing Term.__float__.
+    # Other values (e.g. floats or arithmetic Terms) are converted with float().
+    _VALUE_DISPATCH = {Constant: lambda a: float(a.functor)}
+
     def one(self):
         return 1.0
 
@@ -208,7 +213,7 @@ class SemiringProbability(Semiring):
         return a / z
 
     def value(self, a):
-        v = float(a)
+        v = self._VALUE_DISPATCH.get(type(a), float)(a)
         if 0.0 - 1e-9 <= v <= 1.0 + 1e-9:
             return v
         else:
@@ -262,7 +267,7 @@ class SemiringLogProbability(SemiringProbability):
         return math.log1p(-math.exp(a))
 
     def value(self, a):
-        v = float(a)
+        v = self._VALUE_DISPATCH.get(type(a), float)(a)
         if -1e-9 <= v < 1e-9:
             return self.zero()
         else:
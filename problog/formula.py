@@ -413,9 +413,25 @@ class BaseFormula(ProbLogObject):
         return hasattr(self, flag) and getattr(self, flag)
 
 
-atom = namedtuple("atom", ("identifier", "probability", "group", "name", "source"))
-conj = namedtuple("conj", ("children", "name"))
-disj = namedtuple("disj", ("children", "name"))
+# Integer type tags of the nodes, available as node._nodetype.
+ATOM, CONJ, DISJ = 0, 1, 2
+
+
+class atom(
+    namedtuple("atom", ("identifier", "probability", "group", "name", "source"))
+):
+    __slots__ = ()
+    _nodetype = ATOM
+
+
+class conj(namedtuple("conj", ("children", "name"))):
+    __slots__ = ()
+    _nodetype = CONJ
+
+
+class disj(namedtuple("disj", ("children", "name"))):
+    __slots__ = ()
+    _nodetype = DISJ
 
 
 class LogicFormula(BaseFormula):
@@ -541,14 +557,14 @@ class LogicFormula(BaseFormula):
         """
         if reuse:
             # Determine the node's key and lookup identifier base on node type.
-            ntype = type(node).__name__
-            if ntype == "atom":
+            ntype = node._nodetype
+            if ntype == ATOM:
                 key = node.identifier
                 collection = self._index_atom
-            elif ntype == "conj":
+            elif ntype == CONJ:
                 key = node.children
                 collection = self._index_conj
-            elif ntype == "disj":
+            elif ntype == DISJ:
                 key = node.children
                 collection = self._index_disj
             else:
@@ -560,7 +576,7 @@ class LogicFormula(BaseFormula):
                 # Add the entry to the collection
                 collection[key] = index
                 # If atom, update max index
-                if ntype == "atom" and type(key) == int and key >= self._index_next:
+                if ntype == ATOM and type(key) == int and key >= self._index_next:
                     self._index_next = key + 1
                 # Add entry to the set of nodes
                 self._nodes.append(node)
@@ -1458,8 +1474,7 @@ label_all=True)
             if not relevant[root]:
                 relevant[root] = True
                 node = self.get_node(root)
-                ntype = type(node).__name__
-                if ntype != "atom":
+                if node._nodetype != ATOM:
                     for c in node.children:
                         if not relevant[abs(c)]:
                             roots.add(abs(c))
@@ -1533,14 +1548,14 @@ label_all=True)
             return target.FALSE
         else:
             node = self.get_node(abs(index))
-            ntype = type(node).__name__
+            ntype = node._nodetype
             sign = 1 if index > 0 else -1
-            if ntype == "atom":
+            if ntype == ATOM:
                 at = target.add_atom(*node)
-            elif ntype == "conj":
+            elif ntype == CONJ:
                 children = [self.copy_node(target, c) for c in node.children]
                 at = target.add_and(children)
-            elif ntype == "disj":
+            elif ntype == DISJ:
                 children = [self.copy_node(target, c) for c in node.children]
                 at = target.add_or(children)
             if sign < 0:
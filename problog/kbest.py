@@ -247,7 +247,7 @@ class Border(object):
                     probability = self.semiring.times(probability, wp)
             probability = self.semiring.result(probability)
 
-            constraint = ClauseConstraint(list(map(lambda x: -x, solution)))
+            constraint = ClauseConstraint([-x for x in solution])
             self.wcnf.add_constraint(constraint, True)
             # literals = list(map(m.literal, solution))
 
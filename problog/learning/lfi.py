@@ -1598,7 +1598,7 @@ def print_result(d, outf, precision=8):
     success, d = d
     if success:
         score, weights, names, iterations, lfi = d
-        weights = list(map(lambda x: round(x, precision), weights))
+        weights = [round(x, precision) for x in weights]
         print(score, weights, names, iterations, file=outf)
         return 0
     else:
@@ -6,12 +6,12 @@ from problog.extern import problog_export, problog_export_raw
 
 @problog_export("+list", "-str")
 def concat(terms):
-    return make_safe("".join(map(lambda x: unquote(str(x)), terms)))
+    return make_safe("".join([unquote(str(x)) for x in terms]))
 
 
 @problog_export("+str", "+list", "-str")
 def join(sep, terms):
-    return make_safe(unquote(sep).join(map(lambda x: unquote(str(x)), terms)))
+    return make_safe(unquote(sep).join([unquote(str(x)) for x in terms]))
 
 
 @problog_export("+str", "-list")
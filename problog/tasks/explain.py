@@ -51,7 +51,7 @@ def main(argv):
         pl = PrologFile(args.filename)
         db = DefaultEngine().prepare(pl)
 
-        program = list(map(lambda s: "%s." % s, db.iter_raw()))
+        program = ["%s." % s for s in db.iter_raw()]
         cnf = KBestFormula.create_from(db, label_all=True)
 
         explanation = []
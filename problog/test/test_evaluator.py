@@ -17,10 +17,14 @@ limitations under the License.
 """
 import unittest
 
+from unittest import mock
+
+from problog import ddnnf_formula
+from problog.ddnnf_formula import DDNNF
 from problog.program import PrologString
 from problog.formula import LogicFormula
 from problog import get_evaluatable
-from problog.evaluator import SemiringProbability
+from problog.evaluator import SemiringProbability, SemiringLogProbability
 from problog.logic import Term
 
 # noinspection PyBroadException
@@ -116,6 +120,107 @@ class TestEvaluator(unittest.TestCase):
         self.assertEqual(0.06, results)
 
 
+class TestDDNNFEvaluator(unittest.TestCase):
+    program = """
+        0.3::a. 0.6::b. 0.2::c.
+        d :- a; b.
+        e :- d, \\+c.
+        evidence(d).
+        query(a). query(b). query(c). query(e).
+    """
+
+    def evaluate(self, semiring, use_kernel):
+        """Evaluate the program with or without the specialized kernel for the semiring.
+
+        :return: tuple (results, number of times the kernel was used)
+        """
+        kernel = ddnnf_formula._SWEEP_KERNELS[type(semiring)]
+        calls = []
+
+        def counting_kernel(*args):
+            calls.append(args)
+            return kernel(*args)
+
+        kernels = {type(semiring): counting_kernel} if use_kernel else {}
+        with mock.patch.dict(ddnnf_formula._SWEEP_KERNELS, kernels, clear=True):
+            kc = DDNNF.create_from(PrologString(self.program))
+            self.assertTrue(kc.is_sorted())
+            results = kc.evaluate(semiring=semiring)
+        return results, len(calls)
+
+    def assertResultsEqual(self, expected, results):
+        self.assertEqual(set(expected), set(results))
+        for key in expected:
+            self.assertAlmostEqual(expected[key], results[key], places=12)
+
+    def test_probability_kernel(self):
+        """The probability kernel is used on a compiled formula and matches the generic path."""
+        expected, calls = self.evaluate(SemiringProbability(), use_kernel=False)
+        self.assertEqual(0, calls)
+        results, calls = self.evaluate(SemiringProbability(), use_kernel=True)
+        self.assertGreater(calls, 0)
+        self.assertResultsEqual(expected, results)
+
+    def test_log_probability_kernel(self):
+        """The log-probability kernel is used on a compiled formula and matches the generic path."""
+        expected, calls = self.evaluate(SemiringLogProbability(), use_kernel=False)
+        self.assertEqual(0, calls)
+        results, calls = self.evaluate(SemiringLogProbability(), use_kernel=True)
+        self.assertGreater(calls, 0)
+        self.assertResultsEqual(expected, results)
+
+    def test_log_probability_kernel_zero_disjunction(self):
+        """The log-probability kernel handles a disjunction of which all children are -inf."""
+        semiring = SemiringLogProbability()
+        kc = DDNNF()
+        a = kc.add_atom(1, 0.3, name=Term("a"))
+        b = kc.add_atom(2, 0.6, name=Term("b"))
+        c = kc.add_atom(3, 0.5, name=Term("c"))
+        d = kc.add_or((a, b))
+        kc.add_or((kc.add_and((d, c)), -c))
+
+        kernel = mock.Mock(wraps=ddnnf_formula._sweep_log_probability)
+        weights = []
+        for kernels in ({}, {SemiringLogProbability: kernel}):
+            with mock.patch.dict(ddnnf_formula._SWEEP_KERNELS, kernels, clear=True):
+                evaluator = kc.get_evaluator(semiring=semiring)
+                evaluator.set_weight(a, semiring.zero(), semiring.one())
+                evaluator.set_weight(b, semiring.zero(), semiring.one())
+                evaluator.cache_intermediate.clear()
+                kernel.reset_mock()
+                evaluator.get_root_weight()
+                weights.append(dict(evaluator.cache_intermediate))
+        self.assertEqual(1, kernel.call_count)
+        expected, results = weights
+        self.assertEqual(semiring.zero(), results[d])
+        self.assertResultsEqual(expected, results)
+
+    def test_repeated_queries(self):
+        """Queries on one evaluator give the same results as on a fresh evaluator per query."""
+        kc = DDNNF.create_from(PrologString(self.program))
+        self.assertTrue(kc.is_sorted())
+        semiring = SemiringProbability()
+        queries = [node for _, node in kc.queries()]
+        queries += [-node for node in queries]
+
+        evaluator = kc.get_evaluator(semiring=semiring)
+        with mock.patch.object(
+            evaluator, "_calculate_weights", wraps=evaluator._calculate_weights
+        ) as update:
+            results = [evaluator.evaluate(node) for node in queries]
+            # The ancestors of each query are recomputed in topological order.
+            self.assertEqual(len(queries), update.call_count)
+        for node, result in zip(queries, results):
+            expected = kc.get_evaluator(semiring=semiring).evaluate(node)
+            self.assertAlmostEqual(expected, result, places=12)
+
+
 if __name__ == "__main__":
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestEvaluator)
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite(
+        [
+            loader.loadTestsFromTestCase(TestEvaluator),
+            loader.loadTestsFromTestCase(TestDDNNFEvaluator),
+        ]
+    )
     unittest.TextTestRunner(verbosity=2).run(suite)
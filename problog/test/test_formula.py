@@ -0,0 +1,37 @@
+"""
+Part of the ProbLog distribution.
+
+Copyright 2019 KU Leuven, DTAI Research Group
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+from problog.formula import LogicFormula
+
+
+class TestFormula(unittest.TestCase):
+    def test_next_atom_identifier(self):
+        """Adding an atom with an integer identifier advances the next free identifier."""
+        lf = LogicFormula()
+        self.assertEqual(0, lf.get_next_atom_identifier())
+        lf.add_atom(5, 0.3)
+        lf.add_atom(7, 0.2)
+        self.assertEqual(8, lf.get_next_atom_identifier())
+        lf.add_atom(6, 0.4)
+        self.assertEqual(8, lf.get_next_atom_identifier())
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestFormula)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -59,6 +59,21 @@ class TestTransformation(unittest.TestCase):
         kc = kc_class.create_from(lf)  # type: LogicFormula
         self.assertEqual(3, kc.atomcount)
 
+    def test_compile_many(self):
+        """Compiling several CNFs at once gives the same result as compiling them one by one."""
+        from problog.cnf_formula import CNF
+        from problog.ddnnf_formula import DDNNF, Compiler
+
+        programs = [
+            "0.2::a. 0.3::b. c :- a; b. query(c).",
+            "0.2::a ; 0.8::b. c :- a, \\+b. query(c).",
+            "0.5::a. query(a).",
+        ]
+        cnfs = [CNF.create_from(PrologString(p)) for p in programs]
+        expected = [DDNNF.create_from(cnf).evaluate() for cnf in cnfs]
+        results = [nnf.evaluate() for nnf in Compiler.compile_many(cnfs)]
+        self.assertEqual(expected, results)
+
 
 if __name__ == "__main__":
     suite = unittest.TestLoader().loadTestsFromTestCase(TestTransformation)
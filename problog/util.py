@@ -35,6 +35,9 @@ import tempfile
 import imp
 import collections
 
+# Processes started by subprocess_call that have not finished yet (from any thread).
+_running_processes = set()
+
 
 class ProbLogLogFormatter(logging.Formatter):
     def __init__(self):
@@ -198,13 +201,20 @@ def subprocess_call(*popenargs, **kwargs):
     Additionally expands executable name to full path.
 
     :param popenargs: positional arguments of subprocess.call
-    :param kwargs: keyword arguments of subprocess.call
+    :param kwargs: keyword arguments of subprocess.call, and optionally 'input' (bytes) which is \
+    sent to the standard input of the process
     :return: result of subprocess.call
     """
     process = None
+    data = kwargs.pop("input", None)
+    if data is not None:
+        kwargs["stdin"] = subprocess.PIPE
     try:
         popenargs = _find_process(*popenargs)
         process = subprocess.Popen(*popenargs, **kwargs)
+        _running_processes.add(process)
+        if data is not None:
+            process.communicate(data)
         return process.wait()
     except KeyboardInterrupt:
         kill_proc_tree(process)
@@ -212,6 +222,23 @@ def subprocess_call(*popenargs, **kwargs):
     except SystemExit:
         kill_proc_tree(process)
         raise
+    finally:
+        _running_processes.discard(process)
+
+
+def kill_running_processes():
+    """Kill all processes started by subprocess_call that are still running.
+
+    Only the main thread receives KeyboardInterrupt and SystemExit, so this is used to stop \
+    processes that were started from other threads.
+    """
+    for process in list(_running_processes):
+        if process.poll() is None:
+            try:
+                kill_proc_tree(process)
+            except Exception:
+                # The process terminated in the meantime.
+                pass
 
 
 def _find_process(cmd, *rest):
@@ -406,7 +433,7 @@ def format_tuple(data, precision=8, columnsep="\t"):
         # is a string -> return string itself
         return data
     elif isinstance(data, collections.Sequence):
-        values = list(map(lambda v: format_value(v, precision=precision), data))
+        values = [format_value(v, precision=precision) for v in data]
         if len(values) == 2 and values[0] == values[1]:
             values = [values[0]]
         return columnsep.join(values)
@@ -63,9 +63,9 @@ def print_result_mpe(d, output, precision=8):
     success, d = d
     if success:
         result["SUCCESS"] = True
-        result["atoms"] = list(
-            map(lambda n: (str(-n), False) if n.is_negated() else (str(n), True), d)
-        )
+        result["atoms"] = [
+            (str(-n), False) if n.is_negated() else (str(n), True) for n in d
+        ]
     else:
         result["SUCCESS"] = False
         result["err"] = process_error(d)